@@ -1,26 +1,310 @@
 #!/usr/bin/env python3
 # subset_sum_basic.py
 import csv
+import io
+import math
+import mmap
+import os
+import re
+import stat
 import sys
-from decimal import Decimal, getcontext, InvalidOperation
+from decimal import Decimal, InvalidOperation, localcontext
 
-getcontext().prec = 50  # buena precisión para decimales
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba es opcional; sin él se usa la versión numpy
+    njit = None
+
+try:
+    import numexpr as ne
+    ne.set_num_threads(os.cpu_count() or 1)
+except ImportError:  # numexpr es opcional; sin él se usa numpy directamente
+    ne = None
+
+try:
+    import _decimal  # noqa: F401  implementación en C (libmpdec)
+except ImportError:
+    print("AVISO: decimal usa la implementación en Python puro (_pydecimal); "
+        "el parseo de números será mucho más lento", file=sys.stderr)
+
+BNB_MAX_NODES = 100_000  # presupuesto del branch-and-bound antes de pasar a meet-in-the-middle
+DP_MIN_N = 21  # por debajo meet-in-the-middle ya es instantáneo
+DP_MAX_TARGET = 10**7  # target escalado máximo para el DP (bitset de ~1.25 MB)
+# el DP guarda ~2·sqrt(n) bitsets de target/8 bytes (ver dp_memory); con
+# DP_MAX_TARGET y 512 MB entran filas de hasta ~40.000 números
+DP_MAX_BYTES = 512 * 2**20
+NUMEXPR_MIN_SIZE = 1 << 16  # por debajo el overhead de numexpr no compensa
 
 def d(x: str) -> Decimal:
     x = x.strip()
     if x.count(",") == 1 and x.count(".") == 0:
         x = x.replace(",", ".")
     try:
-        return Decimal(x)
+        v = Decimal(x)
     except InvalidOperation:
         raise ValueError(f"No puedo convertir a número: {x!r}")
+    if not v.is_finite():
+        raise ValueError(f"No puedo convertir a número: {x!r}")
+    return v
+
+def numstr(v: int, scale: int) -> str:
+    """Formatea un entero escalado por 10^scale, sin ceros sobrantes."""
+    sign = "-" if v < 0 else ""
+    whole, frac = divmod(abs(v), 10**scale)
+    if not frac:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}.{frac:0{scale}d}".rstrip("0")
+
+def to_scaled(nums):
+    """Convierte Decimals a enteros exactos con una escala común 10^k."""
+    k = max(-min(x.as_tuple().exponent, 0) for x in nums)
+    ints = []
+    for x in nums:
+        num, den = x.as_integer_ratio()
+        ints.append(num * 10**k // den)
+    return ints, k
+
+def set_bits(mask: int):
+    """Índices de los bits en 1 de mask, de menor a mayor (salta los ceros)."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def subset_sums(items, dtype):
+    """Sumas de todos los subconjuntos de items; el índice es la máscara."""
+    sums = np.zeros(1, dtype=dtype)
+    for v in items:
+        sums = np.concatenate([sums, sums + v])
+    return sums
+
+def _half_sums(items):
+    """Como subset_sums, pero sobre un array int64 ya reservado (kernel jit)."""
+    sums = np.zeros(1 << items.size, dtype=np.int64)
+    k = 1
+    for v in items:
+        for j in range(k):
+            sums[k + j] = sums[j] + v
+        k *= 2
+    return sums
+
+def _mitm_kernel(arr, target):
+    """Meet-in-the-middle en un solo bucle nativo; devuelve (suma, máscara)."""
+    half = arr.size // 2
+    sums_b = _half_sums(arr[half:])
+    order = np.argsort(sums_b)
+    sorted_b = sums_b[order]
+
+    # la mitad A se recorre en orden Gray sin guardar sus sumas: cada
+    # máscara difiere de la anterior en un solo bit, así que s1 se
+    # actualiza con una única suma/resta
+    best = 0
+    best_mask = 0
+    s1 = 0
+    mask_a = 0
+    for g in range(1 << half):
+        if g:
+            bit = 0
+            while not (g >> bit) & 1:
+                bit += 1
+            mask_a ^= 1 << bit
+            s1 += (((mask_a >> bit) & 1) * 2 - 1) * arr[bit]
+        if s1 + sorted_b[0] > target:  # ni con la menor suma de B entra
+            continue
+        j = np.searchsorted(sorted_b, target - s1, side="right") - 1
+        if j >= 0 and s1 + sorted_b[j] > best:
+            best = s1 + sorted_b[j]
+            best_mask = mask_a | (order[j] << half)
+            if best == target:  # no se puede mejorar
+                break
+    return best, best_mask
+
+if njit is not None:
+    _half_sums = njit(cache=True)(_half_sums)
+    _mitm_kernel = njit(cache=True)(_mitm_kernel)
+
+def _recompile_without_cache():
+    """Reemplaza los kernels por versiones jit sin caché en disco."""
+    global _half_sums, _mitm_kernel
+    _half_sums = njit(_half_sums.py_func)
+    _mitm_kernel = njit(_mitm_kernel.py_func)
+
+def branch_and_bound(arr, target, max_nodes=BNB_MAX_NODES):
+    """DFS con poda sobre arr ordenado de mayor a menor; devuelve (suma, máscara).
+
+    Devuelve None si hay negativos (la poda no vale) o si se agota max_nodes.
+    """
+    if min(arr) < 0:
+        return None
+    order = sorted(range(len(arr)), key=arr.__getitem__, reverse=True)
+    vals = [arr[i] for i in order]
+    # suffix[i] = lo máximo que aún se puede sumar desde i
+    suffix = [0] * (len(vals) + 1)
+    for i in range(len(vals) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + vals[i]
 
-def numstr(x: Decimal) -> str:
-    return str(int(x)) if x == x.to_integral_value() else format(x.normalize(), "f")
+    best = 0
+    best_picked = 0
+    nodes = 0
+    # DFS con pila explícita (la recursión revienta con filas de ~1000
+    # números); se apila primero "excluir" para explorar antes "incluir"
+    stack = [(0, 0, 0)] if target > 0 else []
+    while stack:
+        i, s, picked = stack.pop()
+        if s > best:
+            best, best_picked = s, picked
+            if best == target:
+                break
+        if i == len(vals) or s + suffix[i] <= best:
+            continue
+        nodes += 1
+        if nodes > max_nodes:
+            return None
+        stack.append((i + 1, s, picked))
+        if s + vals[i] <= target:
+            stack.append((i + 1, s + vals[i], picked | (1 << i)))
+
+    mask = 0
+    for k in set_bits(best_picked):
+        mask |= 1 << order[k]
+    return best, mask
+
+def dp_memory(n, target):
+    """Bytes aproximados que usa bitset_dp: checkpoints + capas de un bloque."""
+    return 2 * math.isqrt(n) * (target // 8 + 1)
+
+def bitset_dp(arr, target):
+    """DP pseudo-polinomial O(n·target/64) sobre enteros >= 0; devuelve (suma, máscara)."""
+    # el bit s de reach indica si la suma s es alcanzable; un int de Python
+    # hace de bitset y el shift/or procesa 64 sumas por palabra
+    limit = (1 << (target + 1)) - 1
+    n = len(arr)
+    # para reconstruir hace falta la capa de antes de cada item; guardar las n
+    # costaría n·target/8 bytes, así que guardamos una cada `step` items y las
+    # del medio se recalculan por bloque al volver
+    step = max(1, math.isqrt(n))
+    checkpoints = []  # checkpoints[b] = sumas alcanzables con arr[:b * step]
+    reach = 1
+    for i, v in enumerate(arr):
+        if i % step == 0:
+            checkpoints.append(reach)
+        reach = (reach | (reach << v)) & limit
+    best = reach.bit_length() - 1
+
+    # reconstrucción hacia atrás: si s ya era alcanzable sin arr[i], no lo usamos
+    mask = 0
+    s = best
+    for b in range(len(checkpoints) - 1, -1, -1):
+        start = b * step
+        end = min(start + step, n)
+        layers = [checkpoints[b]]  # layers[k] = sumas alcanzables con arr[:start + k]
+        for v in arr[start:end - 1]:
+            layers.append((layers[-1] | (layers[-1] << v)) & limit)
+        for i in range(end - 1, start - 1, -1):
+            if not (layers[i - start] >> s) & 1:
+                mask |= 1 << i
+                s -= arr[i]
+    return best, mask
+
+def best_subset(arr, target):
+    """Mayor suma <= target de un subconjunto de arr (enteros); devuelve (suma, máscara)."""
+    # primero branch-and-bound: en filas realistas termina enseguida
+    found = branch_and_bound(arr, target)
+    if found is not None:
+        return found
+    # con muchos números y un target escalado chico (p.ej. centavos) el DP
+    # es mucho más rápido que O(2^(n/2))
+    if (len(arr) >= DP_MIN_N and 0 < target <= DP_MAX_TARGET and min(arr) >= 0
+            and dp_memory(len(arr), target) <= DP_MAX_BYTES):
+        return bitset_dp(arr, target)
+    return meet_in_the_middle(arr, target)
+
+def meet_in_the_middle(arr, target):
+    """Mayor suma <= target en O(2^(n/2)); devuelve (suma, máscara)."""
+    # meet-in-the-middle: enumeramos las sumas de cada mitad con numpy,
+    # ordenamos las de B y con searchsorted buscamos para cada suma de A
+    # el mejor complemento <= target
+    # int64 mientras no haya overflow posible; si no, enteros de Python
+    dtype = np.int64 if abs(target) + sum(map(abs, arr)) < 2**63 else object
+    if njit is not None and dtype is np.int64:
+        values = np.array(arr, dtype=np.int64)
+        try:
+            best, mask = _mitm_kernel(values, target)
+        except (ImportError, AttributeError):
+            # el caché de numba guarda el nombre del módulo: si lo escribió
+            # una carga con otro nombre (importlib, "<dynamic>") no se puede
+            # leer desde acá, así que se compila de nuevo sin caché
+            _recompile_without_cache()
+            best, mask = _mitm_kernel(values, target)
+        return int(best), int(mask)
+
+    half = len(arr) // 2
+    sums_a = subset_sums(arr[:half], dtype)
+    sums_b = subset_sums(arr[half:], dtype)
+
+    # con arrays grandes numexpr evalúa las comparaciones por bloques y en
+    # varios hilos, sin los temporales intermedios de numpy
+    use_ne = ne is not None and dtype is np.int64 and sums_a.size + sums_b.size >= NUMEXPR_MIN_SIZE
+
+    # una suma de B solo sirve si entra junto a la menor suma de A (que con
+    # negativos puede ser < 0, así que no alcanza con sums_b <= target)
+    limit = target - int(sums_a.min())
+    if use_ne:
+        fits = ne.evaluate("sums_b <= limit", local_dict={"sums_b": sums_b, "limit": limit})
+    else:
+        fits = sums_b <= limit
+    masks_b = np.flatnonzero(fits)
+    masks_b = masks_b[np.argsort(sums_b[masks_b], kind="stable")]
+    sorted_b = sums_b[masks_b]
+    if not sorted_b.size:
+        return 0, 0
+
+    pos = np.searchsorted(sorted_b, target - sums_a, side="right") - 1
+    comp = sorted_b[pos]
+    if use_ne:
+        totals = ne.evaluate(
+            "where(pos >= 0, sums_a + comp, -1)",
+            local_dict={"pos": pos, "sums_a": sums_a, "comp": comp},
+        )
+    else:
+        totals = np.where(pos >= 0, sums_a + comp, -1)
+    mask_a = int(np.argmax(totals))
+    if totals[mask_a] <= 0:
+        return 0, 0
+    return int(totals[mask_a]), mask_a | (int(masks_b[pos[mask_a]]) << half)
+
+_BARE_CR_RE = re.compile(rb"\r(?!\n)")
+
+def read_rows(path: str):
+    """Itera (n.º de fila, celdas) leyendo el CSV con mmap y split en C.
+
+    Las líneas con comillas se pasan a csv.reader (pueden tener comas dentro).
+    Pipes, archivos vacíos y archivos con fin de línea "\r" solo (mm.readline
+    corta únicamente en "\n") se leen con csv.reader, como antes.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if stat.S_ISREG(st.st_mode) and st.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not _BARE_CR_RE.search(mm):
+                    for idx, line in enumerate(iter(mm.readline, b""), start=1):
+                        text = line.decode("utf-8")
+                        if '"' in text:
+                            yield idx, next(csv.reader([text]))
+                        else:
+                            yield idx, text.rstrip("\r\n").split(",")
+                    return
+        text_f = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        yield from enumerate(csv.reader(text_f), start=1)
 
 def main(path: str):
-    with open(path, newline="", encoding="utf-8") as f:
-        for idx, row in enumerate(csv.reader(f), start=1):
+    # Contexto local solo para no tocar el contexto decimal global de quien
+    # importe este módulo; Decimal(str), as_tuple y as_integer_ratio no usan prec.
+    with localcontext() as ctx:
+        ctx.prec = 12
+        for idx, row in read_rows(path):
             # saltar filas vacías
             if not row or all(not c.strip() for c in row):
                 continue
@@ -29,30 +313,17 @@ def main(path: str):
             if len(nums) < 2:
                 print(f"Row {idx}: ERROR need at least 1 big and 1 small number", file=sys.stderr)
                 continue
-            target = nums[0]
-            arr = nums[1:]
-
-            best_sum = Decimal(0)
-            best_subset = []
-
-            n = len(arr)
-            for mask in range(1 << n):
-                s = Decimal(0)
-                subset = []
-                ok = True
-                for i in range(n):
-                    if mask & (1 << i):
-                        s += arr[i]
-                        if s > target:
-                            ok = False
-                            break
-                        subset.append(arr[i])
-                if ok and s > best_sum:
-                    best_sum = s
-                    best_subset = subset
-
-            chosen = "[" + ", ".join(numstr(x) for x in best_subset) + "]"
-            print(f"Row {idx}: chosen={chosen} sum={numstr(best_sum)} / target={numstr(target)}")
+
+            # todo el cálculo con enteros escalados; Decimal solo para parsear
+            ints, scale = to_scaled(nums)
+            target = ints[0]
+            arr = ints[1:]
+
+            best_sum, best_mask = best_subset(arr, target)
+            best_items = [arr[i] for i in set_bits(best_mask)]
+
+            chosen = "[" + ", ".join(numstr(x, scale) for x in best_items) + "]"
+            print(f"Row {idx}: chosen={chosen} sum={numstr(best_sum, scale)} / target={numstr(target, scale)}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
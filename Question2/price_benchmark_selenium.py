@@ -6,12 +6,13 @@ Description: Fetches and compares prices from Newegg, Amazon, and eBay/Best Buy
             for consumer electronics price benchmarking.
 """
 
-import re, sys, time, json, random, argparse
-from decimal import Decimal
-from dataclasses import dataclass, asdict
+import re, sys, time, random, argparse, sqlite3, threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, Tuple, List
-import requests
-from bs4 import BeautifulSoup
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
 
 # -------------------- Configuration --------------------
@@ -21,11 +22,20 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0'
 ]
 
+# Precompiled patterns (used per price/title, so compile once at import)
+_CURRENCY_RE = re.compile(r'[$€£¥₹,]')
+_NUM_RE = re.compile(r'\d+\.?\d*')
+_NEWEGG_SUFFIX_RE = re.compile(r'\s*-\s*Newegg\.com.*$')
+_WS_RE = re.compile(r'\s+')
+
+CACHE_PATH = '.price_cache.sqlite'
+CACHE_EXPIRE_AFTER = 3600  # seconds
+
 # -------------------- Data Models --------------------
 @dataclass
 class PriceResult:
     site: str
-    price: Optional[Decimal]
+    price: Optional[float]
     currency: str = "USD"
     url: Optional[str] = None
     title: Optional[str] = None
@@ -35,6 +45,18 @@ class PriceResult:
     def __post_init__(self):
         if not self.timestamp:
             self.timestamp = datetime.now().isoformat()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Flat dict for output (cheaper than dataclasses.asdict's deep copy)"""
+        return {
+            'site': self.site,
+            'price': self.price,
+            'currency': self.currency,
+            'url': self.url,
+            'title': self.title,
+            'status': self.status,
+            'timestamp': self.timestamp,
+        }
 
 @dataclass
 class BenchmarkResult:
@@ -44,50 +66,108 @@ class BenchmarkResult:
     metadata: Dict[str, Any]
 
 # -------------------- Utilities --------------------
-def parse_price(text: str) -> Optional[Decimal]:
+def parse_price(text: str) -> Optional[float]:
     """Extract price from text string"""
     if not text:
         return None
     
     # Remove currency symbols and extra whitespace
-    cleaned = re.sub(r'[$€£¥₹,]', '', text).strip()
+    cleaned = _CURRENCY_RE.sub('', text).strip()
     
     # Find first number pattern
-    match = re.search(r'\d+\.?\d*', cleaned)
+    match = _NUM_RE.search(cleaned)
     if match:
-        try:
-            return Decimal(match.group())
-        except:
-            pass
+        return float(match.group())
     return None
 
-def create_session() -> requests.Session:
-    """Create HTTP session with browser-like headers"""
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': random.choice(USER_AGENTS),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    })
-    return session
+def create_client() -> httpx.Client:
+    """Create pooled HTTP/2 client with browser-like headers"""
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=10,
+        # No Accept-Encoding: httpx only advertises encodings it can decode
+        headers={
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'DNT': '1',
+            'Upgrade-Insecure-Requests': '1',
+        },
+    )
+
+# Shared by all scrapers so connections (TCP + TLS) are reused across calls
+CLIENT = create_client()
+
+class ResponseCache:
+    """SQLite cache of successfully scraped responses, keyed by full request URL"""
+    
+    def __init__(self, path: str = CACHE_PATH, expire_after: int = CACHE_EXPIRE_AFTER):
+        self.expire_after = expire_after
+        # Scrapers run in worker threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(url TEXT PRIMARY KEY, content_type TEXT, body BLOB, created REAL)'
+        )
+    
+    def get(self, url: str) -> Optional[httpx.Response]:
+        """Return cached response for url if present and not expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT content_type, body FROM responses WHERE url = ? AND created > ?',
+                (url, time.time() - self.expire_after)
+            ).fetchone()
+        if not row:
+            return None
+        return httpx.Response(200, headers={'Content-Type': row[0]}, content=row[1],
+                            request=httpx.Request('GET', url),
+                            extensions={'from_cache': True})
+    
+    def set(self, url: str, response: httpx.Response) -> None:
+        """Store a successful response body"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                (url, response.headers.get('Content-Type', ''), response.content, time.time())
+            )
+
+# Enabled by main() unless --no-cache is given
+CACHE: Optional[ResponseCache] = None
+
+def enable_cache(path: str = CACHE_PATH, expire_after: int = CACHE_EXPIRE_AFTER) -> None:
+    """Serve repeated requests from disk for expire_after seconds"""
+    global CACHE
+    CACHE = ResponseCache(path, expire_after)
+
+def cache_response(url: str, params: Optional[Dict], response: httpx.Response) -> None:
+    """Store a response once a scraper has parsed a price from it
+
+    Not done in safe_request: captcha/block pages also come back as 200.
+    Cache hits are not stored again, so entries still expire on time.
+    """
+    if CACHE and not response.extensions.get('from_cache'):
+        CACHE.set(str(httpx.URL(url, params=params)), response)
 
-def safe_request(url: str, params: Optional[Dict] = None, 
-                session: Optional[requests.Session] = None,
-                timeout: int = 10) -> Optional[requests.Response]:
+def safe_request(url: str, params: Optional[Dict] = None,
+                referer: Optional[str] = None,
+                timeout: int = 10) -> Optional[httpx.Response]:
     """Make HTTP request with error handling"""
-    if not session:
-        session = create_session()
+    if CACHE:
+        cached = CACHE.get(str(httpx.URL(url, params=params)))
+        if cached:
+            return cached
+    
+    headers = {'User-Agent': random.choice(USER_AGENTS)}
+    if referer:
+        headers['Referer'] = referer
     
     try:
-        response = session.get(url, params=params, timeout=timeout)
+        response = CLIENT.get(url, params=params, headers=headers, timeout=timeout)
         if response.status_code == 200:
             return response
         print(f"    Status code {response.status_code} for {url}")
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"    Request failed: {str(e)[:50]}")
     return None
 
@@ -101,44 +181,46 @@ class NeweggScraper:
         print(f"  → Fetching from Newegg...")
         url = f"https://www.newegg.com/p/{item_number}"
         
-        session = create_session()
-        session.headers['Referer'] = 'https://www.newegg.com/'
-        
-        response = safe_request(url, session=session)
+        response = safe_request(url, referer='https://www.newegg.com/')
         if not response:
             return PriceResult("newegg", None, status="error"), None
         
         if response.status_code == 403:
             return PriceResult("newegg", None, url=url, status="blocked"), None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.text)
         
         # Extract title
         title = None
-        title_meta = soup.find('meta', {'property': 'og:title'})
-        if title_meta and title_meta.get('content'):
-            title = re.sub(r'\s*-\s*Newegg\.com.*$', '', title_meta['content'])
+        title_meta = tree.css_first('meta[property="og:title"]')
+        if title_meta and title_meta.attributes.get('content'):
+            title = _NEWEGG_SUFFIX_RE.sub('', title_meta.attributes['content'])
         
         # Extract price from meta or JSON-LD
         price = None
-        price_meta = soup.find('meta', {'itemprop': 'price'})
-        if price_meta and price_meta.get('content'):
-            price = parse_price(price_meta['content'])
+        price_meta = tree.css_first('meta[itemprop="price"]')
+        if price_meta and price_meta.attributes.get('content'):
+            price = parse_price(price_meta.attributes['content'])
         
         if not price:
-            # Try JSON-LD
-            for script in soup.find_all('script', type='application/ld+json'):
+            # Try JSON-LD (skip blocks that can't be a Product before decoding)
+            for script in tree.css('script[type="application/ld+json"]'):
+                raw = script.text()
+                if '"Product"' not in raw:
+                    continue
                 try:
-                    data = json.loads(script.string)
-                    if isinstance(data, dict) and data.get('@type') == 'Product':
-                        offers = data.get('offers', {})
-                        if isinstance(offers, dict) and 'price' in offers:
-                            price = parse_price(str(offers['price']))
-                            break
-                except:
+                    data = orjson.loads(raw)
+                except orjson.JSONDecodeError:
                     continue
+                if isinstance(data, dict) and data.get('@type') == 'Product':
+                    offers = data.get('offers', {})
+                    if isinstance(offers, dict) and 'price' in offers:
+                        price = parse_price(str(offers['price']))
+                        break
         
         status = "success" if price else "no_price"
+        if status == "success":
+            cache_response(url, None, response)
         return PriceResult("newegg", price, url=url, title=title, status=status), title
 
 class AmazonScraper:
@@ -149,31 +231,28 @@ class AmazonScraper:
         """Search and get first result from Amazon"""
         print(f"  → Searching Amazon...")
         
-        session = create_session()
-        session.headers['Referer'] = 'https://www.amazon.com/'
-        
         # Simplify query for better results
         simple_query = ' '.join(query.split()[:5])
         url = "https://www.amazon.com/s"
         params = {"k": simple_query}
         
-        response = safe_request(url, params=params, session=session)
+        response = safe_request(url, params=params, referer='https://www.amazon.com/')
         if not response:
             return PriceResult("amazon", None, status="error")
         
         if "Enter the characters" in response.text:
             return PriceResult("amazon", None, url=url, status="captcha")
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.text)
         
         # Find first product
-        product = soup.select_one('[data-component-type="s-search-result"]')
+        product = tree.css_first('[data-component-type="s-search-result"]')
         if not product:
             return PriceResult("amazon", None, url=url, status="no_results")
         
         # Extract title
-        title_elem = product.select_one('h2 span')
-        title = title_elem.get_text(strip=True) if title_elem else None
+        title_elem = product.css_first('h2 span')
+        title = title_elem.text(strip=True) if title_elem else None
         
         # Extract price with multiple selectors
         price = None
@@ -185,18 +264,21 @@ class AmazonScraper:
         ]
         
         for selector in price_selectors:
-            elem = product.select_one(selector)
+            elem = product.css_first(selector)
             if elem:
-                text = elem.get_text(strip=True)
+                text = elem.text(strip=True)
                 price = parse_price(text)
                 if price:
                     break
         
         # Extract URL
-        link = product.select_one('h2 a')
-        product_url = f"https://www.amazon.com{link['href']}" if link else url
+        link = product.css_first('h2 a')
+        href = link.attributes.get('href') if link else None
+        product_url = f"https://www.amazon.com{href}" if href else url
         
         status = "success" if price else "no_price"
+        if status == "success":
+            cache_response(url, params, response)
         return PriceResult("amazon", price, url=product_url, title=title, status=status)
 
 class EbayScraper:
@@ -207,9 +289,6 @@ class EbayScraper:
         """Search and get first Buy It Now result from eBay"""
         print(f"  → Searching eBay...")
         
-        session = create_session()
-        session.headers['Referer'] = 'https://www.ebay.com/'
-        
         # Use simplified query
         simple_query = ' '.join(query.split()[:4])
         url = "https://www.ebay.com/sch/i.html"
@@ -219,14 +298,14 @@ class EbayScraper:
             "_sop": "15"    # Sort by price
         }
         
-        response = safe_request(url, params=params, session=session)
+        response = safe_request(url, params=params, referer='https://www.ebay.com/')
         if not response:
             return PriceResult("ebay", None, status="error")
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.text)
         
         # Find items (skip first as it's often ad)
-        items = soup.select('.s-item')
+        items = tree.css('.s-item')
         if len(items) < 2:
             return PriceResult("ebay", None, url=url, status="no_results")
         
@@ -234,22 +313,24 @@ class EbayScraper:
         product = items[1]
         
         # Extract title
-        title_elem = product.select_one('.s-item__title')
-        title = title_elem.get_text(strip=True) if title_elem else None
+        title_elem = product.css_first('.s-item__title')
+        title = title_elem.text(strip=True) if title_elem else None
         
         # Extract price (skip ranges)
         price = None
-        price_elem = product.select_one('.s-item__price')
+        price_elem = product.css_first('.s-item__price')
         if price_elem:
-            price_text = price_elem.get_text(strip=True)
+            price_text = price_elem.text(strip=True)
             if ' to ' not in price_text and ' - ' not in price_text:
                 price = parse_price(price_text)
         
         # Extract URL
-        link = product.select_one('.s-item__link')
-        product_url = link['href'] if link else url
+        link = product.css_first('.s-item__link')
+        product_url = (link.attributes.get('href') if link else None) or url
         
         status = "success" if price else "no_price"
+        if status == "success":
+            cache_response(url, params, response)
         return PriceResult("ebay", price, url=product_url, title=title, status=status)
 
 class BestBuyScraper:
@@ -260,43 +341,42 @@ class BestBuyScraper:
         """Search and get first result from Best Buy"""
         print(f"  → Searching Best Buy...")
         
-        session = create_session()
-        session.headers['Referer'] = 'https://www.bestbuy.com/'
-        
         simple_query = ' '.join(query.split()[:4])
         url = "https://www.bestbuy.com/site/searchpage.jsp"
         params = {"st": simple_query}
         
-        response = safe_request(url, params=params, session=session)
+        response = safe_request(url, params=params, referer='https://www.bestbuy.com/')
         if not response:
             return PriceResult("bestbuy", None, status="error")
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = LexborHTMLParser(response.text)
         
         # Find first product
-        product = soup.select_one('.sku-item')
+        product = tree.css_first('.sku-item')
         if not product:
             return PriceResult("bestbuy", None, url=url, status="no_results")
         
         # Extract title
-        title_elem = product.select_one('.sku-title a')
-        title = title_elem.get_text(strip=True) if title_elem else None
+        title_elem = product.css_first('.sku-title a')
+        title = title_elem.text(strip=True) if title_elem else None
         
         # Extract price
         price = None
-        price_elem = product.select_one('.priceView-customer-price span')
+        price_elem = product.css_first('.priceView-customer-price span')
         if price_elem:
-            price = parse_price(price_elem.get_text(strip=True))
+            price = parse_price(price_elem.text(strip=True))
         
         # Extract URL
-        link = product.select_one('.sku-title a')
-        if link and link.get('href'):
-            href = link['href']
+        link = product.css_first('.sku-title a')
+        if link and link.attributes.get('href'):
+            href = link.attributes['href']
             product_url = f"https://www.bestbuy.com{href}" if href.startswith('/') else href
         else:
             product_url = url
         
         status = "success" if price else "no_price"
+        if status == "success":
+            cache_response(url, params, response)
         return PriceResult("bestbuy", price, url=product_url, title=title, status=status)
 
 # -------------------- Main Benchmark Function --------------------
@@ -324,46 +404,41 @@ def run_benchmark(item_number: str,
     # 1. Fetch from Newegg
     print(f"\n📦 Newegg Item: {item_number}")
     newegg_result, product_title = NeweggScraper.fetch(item_number)
-    results.append(asdict(newegg_result))
+    results.append(newegg_result.to_dict())
     
     if newegg_result.price:
-        print(f"    ✓ Price: ${newegg_result.price}")
+        print(f"    ✓ Price: ${newegg_result.price:.2f}")
     else:
         print(f"    ✗ Status: {newegg_result.status}")
     
     # 2. Build search query
     search_query = manual_query or product_title or f"product {item_number}"
-    search_query = re.sub(r'\s+', ' ', search_query).strip()
+    search_query = _WS_RE.sub(' ', search_query).strip()
     print(f"\n🔍 Search Query: {search_query}")
     
-    # Add delay to avoid rate limiting
-    time.sleep(random.uniform(1, 2))
+    # 3. Search Amazon and the third site concurrently (different hosts,
+    #    so no inter-site delay is needed)
+    third_scraper = BestBuyScraper if use_bestbuy else EbayScraper
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        amazon_future = executor.submit(AmazonScraper.search, search_query)
+        third_future = executor.submit(third_scraper.search, search_query)
+        amazon_result = amazon_future.result()
+        third_result = third_future.result()
     
-    # 3. Search Amazon
-    amazon_result = AmazonScraper.search(search_query)
-    results.append(asdict(amazon_result))
+    results.append(amazon_result.to_dict())
+    results.append(third_result.to_dict())
     
     if amazon_result.price:
-        print(f"    ✓ Amazon: ${amazon_result.price}")
+        print(f"    ✓ Amazon: ${amazon_result.price:.2f}")
     else:
         print(f"    ✗ Amazon: {amazon_result.status}")
     
-    time.sleep(random.uniform(1, 2))
-    
-    # 4. Search third site
-    if use_bestbuy:
-        third_result = BestBuyScraper.search(search_query)
-    else:
-        third_result = EbayScraper.search(search_query)
-    
-    results.append(asdict(third_result))
-    
     if third_result.price:
-        print(f"    ✓ {third_result.site.title()}: ${third_result.price}")
+        print(f"    ✓ {third_result.site.title()}: ${third_result.price:.2f}")
     else:
         print(f"    ✗ {third_result.site.title()}: {third_result.status}")
     
-    # 5. Calculate summary statistics
+    # 4. Calculate summary statistics
     valid_prices = [r.price for r in [newegg_result, amazon_result, third_result] 
                 if r.price is not None]
     
@@ -372,11 +447,11 @@ def run_benchmark(item_number: str,
         "successful_sites": len(valid_prices),
         "sites_with_prices": [r.site for r in [newegg_result, amazon_result, third_result] 
                             if r.price],
-        "lowest_price": float(min(valid_prices)) if valid_prices else None,
-        "highest_price": float(max(valid_prices)) if valid_prices else None,
-        "average_price": float(sum(valid_prices) / len(valid_prices)) if valid_prices else None,
-        "price_variance": float(max(valid_prices) - min(valid_prices)) if len(valid_prices) >= 2 else None,
-        "savings_potential": float(max(valid_prices) - min(valid_prices)) if len(valid_prices) >= 2 else 0
+        "lowest_price": min(valid_prices) if valid_prices else None,
+        "highest_price": max(valid_prices) if valid_prices else None,
+        "average_price": round(sum(valid_prices) / len(valid_prices), 2) if valid_prices else None,
+        "price_variance": round(max(valid_prices) - min(valid_prices), 2) if len(valid_prices) >= 2 else None,
+        "savings_potential": round(max(valid_prices) - min(valid_prices), 2) if len(valid_prices) >= 2 else 0
     }
     
     metadata = {
@@ -390,10 +465,10 @@ def run_benchmark(item_number: str,
     print("\n" + "="*60)
     if valid_prices:
         print(f"✅ SUCCESS: Found {len(valid_prices)} price(s)")
-        print(f"  • Lowest: ${min(valid_prices)}")
-        print(f"  • Highest: ${max(valid_prices)}")
+        print(f"  • Lowest: ${min(valid_prices):.2f}")
+        print(f"  • Highest: ${max(valid_prices):.2f}")
         if len(valid_prices) >= 2:
-            print(f"  • Potential Savings: ${max(valid_prices) - min(valid_prices)}")
+            print(f"  • Potential Savings: ${max(valid_prices) - min(valid_prices):.2f}")
     else:
         print("⚠️  WARNING: No prices found")
         print("  Suggestions:")
@@ -419,6 +494,7 @@ EXAMPLES:
 %(prog)s N82E16820147795
 %(prog)s N82E16820147795 --query "Samsung SSD 970 EVO"
 %(prog)s N82E16834360760 --bestbuy
+%(prog)s N82E16820147795 --no-cache
 
 COMMON TEST ITEMS:
 N82E16820147795 - Samsung SSD
@@ -442,9 +518,15 @@ Production version would use official APIs and proxy rotation.
                     choices=['json', 'pretty'],
                     default='pretty',
                     help='Output format (default: pretty)')
+    parser.add_argument('--no-cache',
+                    action='store_true',
+                    help='Bypass the on-disk response cache (default: 1 hour)')
     
     args = parser.parse_args()
     
+    if not args.no_cache:
+        enable_cache()
+    
     # Run benchmark
     result = run_benchmark(
         item_number=args.item_number,
@@ -458,7 +540,8 @@ Production version would use official APIs and proxy rotation.
     print("="*60)
     
     if args.output == 'json':
-        print(json.dumps(asdict(result), indent=2, default=str))
+        # orjson serializes the dataclass natively, no asdict() copy needed
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2, default=str).decode())
     else:
         # Pretty print for demonstration
         print(f"\n📊 PRICE COMPARISON RESULTS")
@@ -467,13 +550,13 @@ Production version would use official APIs and proxy rotation.
         print(f"\n💰 PRICES FOUND:")
         for r in result.results:
             if r['price']:
-                print(f"   • {r['site'].upper()}: ${r['price']}")
+                print(f"   • {r['site'].upper()}: ${r['price']:.2f}")
             else:
                 print(f"   • {r['site'].upper()}: {r['status']}")
         
         if result.summary['lowest_price']:
             print(f"\n💡 INSIGHTS:")
-            print(f"   Best Price: ${result.summary['lowest_price']}")
+            print(f"   Best Price: ${result.summary['lowest_price']:.2f}")
             print(f"   Average: ${result.summary['average_price']:.2f}")
             if result.summary['savings_potential'] > 0:
                 print(f"   Max Savings: ${result.summary['savings_potential']:.2f}")